@@ -21,6 +21,8 @@ class ConsumptionRecordAdmin(admin.ModelAdmin):
     list_display = ['institute', 'department', 'date', 'total_emissions', 'created_at']
     list_filter = ['department', 'date', 'institute']
     search_fields = ['institute__username', 'institute__institute_name']
+    search_help_text = 'Search by institute username or name.'
+    list_select_related = ['institute']
     date_hierarchy = 'date'
     readonly_fields = ['electricity_emissions', 'fuel_emissions', 'water_emissions', 
                        'waste_emissions', 'total_emissions']
@@ -0,0 +1,43 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from core.models import Institute
+
+
+class Command(BaseCommand):
+    help = 'Register institutes in bulk from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_file',
+            help='CSV with username, email, password and institute_name columns '
+                 '(address, city and state are optional)',
+        )
+
+    def handle(self, *args, **options):
+        required = {'username', 'email', 'password', 'institute_name'}
+        optional = {'address', 'city', 'state'}
+        
+        with open(options['csv_file'], newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            missing = required - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f'Missing CSV columns: {", ".join(sorted(missing))}')
+            rows = [
+                {key: value for key, value in row.items() if key in required | optional}
+                for row in reader
+            ]
+        
+        try:
+            with transaction.atomic():
+                institutes = Institute.objects.bulk_register(rows)
+        except ValidationError as exc:
+            raise CommandError('No institutes registered:\n' + '\n'.join(exc.messages))
+        except IntegrityError as exc:
+            raise CommandError(f'No institutes registered: {exc}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully registered {len(institutes)} institutes')
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.models import ConsumptionRecord
+
+
+class Command(BaseCommand):
+    help = 'Recalculate stored emissions for consumption records using current emission factors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--institute',
+            help='Only recalculate records belonging to this institute username',
+        )
+
+    def handle(self, *args, **options):
+        records = ConsumptionRecord.objects.all()
+        if options['institute']:
+            records = records.filter(institute__username=options['institute'])
+        
+        updated_count = ConsumptionRecord.bulk_recalculate(records)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully recalculated emissions for {updated_count} records')
+        )
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from core.models import EmissionFactor
+from django.db import transaction
+from core.models import EmissionFactor, clear_factor_cache
 
 
 class Command(BaseCommand):
@@ -99,27 +100,23 @@ class Command(BaseCommand):
             },
         ]
         
-        created_count = 0
-        updated_count = 0
+        objs = [EmissionFactor(**ef_data) for ef_data in emission_factors]
         
-        for ef_data in emission_factors:
-            obj, created = EmissionFactor.objects.update_or_create(
-                category=ef_data['category'],
-                sub_category=ef_data['sub_category'],
-                defaults={
-                    'factor': ef_data['factor'],
-                    'unit': ef_data['unit'],
-                    'description': ef_data['description'],
-                    'source': ef_data['source'],
-                }
+        # Single UPSERT keyed on the (category, sub_category) unique constraint
+        with transaction.atomic():
+            EmissionFactor.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['category', 'sub_category'],
+                update_fields=['factor', 'unit', 'description', 'source'],
             )
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        
+        # bulk_create() bypasses post_save, so clear the cached factors
+        # explicitly; running servers pick them up once their copy expires
+        clear_factor_cache()
         
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully seeded emission factors: {created_count} created, {updated_count} updated'
+                f'Successfully seeded {len(objs)} emission factors'
             )
         )
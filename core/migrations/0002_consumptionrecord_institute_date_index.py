@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="consumptionrecord",
+            index=models.Index(
+                fields=["institute", "-date"], name="core_consum_institu_cb0374_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-15 09:43
+
+import core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_consumptionrecord_institute_date_index"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="institute",
+            managers=[
+                ("objects", core.models.InstituteManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_institute_manager"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="consumptionrecord",
+            name="date",
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="institute",
+            name="email",
+            field=models.EmailField(
+                blank=True, db_index=True, max_length=254, verbose_name="email address"
+            ),
+        ),
+    ]
@@ -1,15 +1,75 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ValidationError
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.utils import timezone
+
+
+class InstituteManager(UserManager):
+    """Manager for institutes, with a bulk registration path."""
+    
+    def bulk_register(self, rows, batch_size=None):
+        """Create institutes from dicts with a single bulk INSERT.
+
+        Each row needs ``username``, ``email``, ``password`` and
+        ``institute_name``; the other keys are passed through as model
+        fields. Every row is validated with ``full_clean()`` first, and a
+        ``ValidationError`` listing all bad rows is raised before anything
+        is inserted. Uniqueness is left to the database. Passwords are hashed
+        here because ``bulk_create`` bypasses ``create_user``.
+        """
+        institutes = []
+        errors = []
+        for index, row in enumerate(rows, start=1):
+            row = dict(row)
+            password = row.pop('password', None) or ''
+            institute = self.model(
+                username=self.model.normalize_username(row.pop('username', None) or ''),
+                email=self.normalize_email(row.pop('email', None) or ''),
+                **row,
+            )
+            
+            field_errors = {}
+            if not password:
+                field_errors['password'] = ['This field cannot be blank.']
+            if not institute.email:
+                field_errors['email'] = ['This field cannot be blank.']
+            try:
+                institute.full_clean(exclude=['password'], validate_unique=False)
+            except ValidationError as exc:
+                field_errors.update(exc.message_dict)
+            
+            for field, messages in field_errors.items():
+                errors.extend(f'Row {index}: {field}: {message}' for message in messages)
+            institute.password = make_password(password)
+            institutes.append(institute)
+        
+        if errors:
+            raise ValidationError(errors)
+        return self.bulk_create(institutes, batch_size=batch_size)
 
 
 class Institute(AbstractUser):
     """Custom user model for institutes."""
+    email = models.EmailField('email address', blank=True, db_index=True)
     institute_name = models.CharField(max_length=255)
     address = models.TextField(blank=True, null=True)
     city = models.CharField(max_length=100, blank=True, null=True)
     state = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = InstituteManager()
+
     def __str__(self):
         return self.institute_name or self.username
 
@@ -51,6 +111,58 @@ class EmissionFactor(models.Model):
         return f"{self.get_category_display()} - {self.get_sub_category_display()}: {self.factor} kg CO2e/{self.unit}"
 
 
+def cache_is_shared():
+    """Return whether the default cache is a shared in-memory store.
+
+    Only Redis and Memcached qualify. A process-local backend would miss
+    other workers' invalidations, and a database or file backend costs a
+    round-trip per lookup, which is no cheaper than the work it caches.
+    """
+    return isinstance(caches['default'], (RedisCache, BaseMemcachedCache))
+
+
+# Emission factors are effectively static, so each process keeps the
+# {sub_category: factor} mapping in memory. Saves in this process clear it
+# at once; other workers reload it within FACTOR_CACHE_TTL seconds, or on
+# their next save when a shared cache carries the version stamp.
+FACTOR_CACHE_TTL = 60
+FACTOR_VERSION_KEY = 'emission_factors_ver'
+
+_factor_cache = {'factors': None, 'loaded_at': 0.0, 'version': None}
+_factor_cache_lock = threading.Lock()
+
+
+def _get_factors():
+    """Return the {sub_category: factor} mapping, from memory if still fresh."""
+    version = cache.get(FACTOR_VERSION_KEY) if cache_is_shared() else None
+    with _factor_cache_lock:
+        if (
+            _factor_cache['factors'] is None
+            or _factor_cache['version'] != version
+            or time.monotonic() - _factor_cache['loaded_at'] >= FACTOR_CACHE_TTL
+        ):
+            _factor_cache.update(
+                factors=dict(EmissionFactor.objects.values_list('sub_category', 'factor')),
+                loaded_at=time.monotonic(),
+                version=version,
+            )
+        return _factor_cache['factors']
+
+
+def clear_factor_cache():
+    """Drop the cached factors; call after bulk writes that skip signals."""
+    with _factor_cache_lock:
+        _factor_cache['factors'] = None
+    if cache_is_shared():
+        cache.set(FACTOR_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+@receiver(post_save, sender=EmissionFactor)
+@receiver(post_delete, sender=EmissionFactor)
+def _clear_factor_cache(sender, **kwargs):
+    clear_factor_cache()
+
+
 class ConsumptionRecord(models.Model):
     """Records consumption data for each department."""
     
@@ -62,9 +174,19 @@ class ConsumptionRecord(models.Model):
         ('TRANSPORT', 'Transport'),
     ]
     
+    # Fallback factors used when a sub-category has not been seeded
+    DEFAULT_FACTORS = {
+        'GRID': 0.82,
+        'DIESEL': 2.68,
+        'PETROL': 2.31,
+        'LPG': 2.98,
+        'MUNICIPAL_WATER': 0.344,
+        'GENERAL_WASTE': 0.58,
+    }
+    
     institute = models.ForeignKey(Institute, on_delete=models.CASCADE, related_name='consumption_records')
     department = models.CharField(max_length=50, choices=DEPARTMENT_CHOICES)
-    date = models.DateField()
+    date = models.DateField(db_index=True)
     
     # Consumption values
     electricity_kwh = models.FloatField(default=0, help_text="Electricity in kWh")
@@ -87,26 +209,30 @@ class ConsumptionRecord(models.Model):
     class Meta:
         ordering = ['-date']
         unique_together = ['institute', 'department', 'date']
+        # (institute, department, date) is already covered by unique_together
+        indexes = [
+            models.Index(fields=['institute', '-date']),
+        ]
     
     def calculate_emissions(self):
         """Calculate emissions based on current emission factors."""
-        factors = {ef.sub_category: ef.factor for ef in EmissionFactor.objects.all()}
+        factors = {**self.DEFAULT_FACTORS, **_get_factors()}
         
         # Electricity emissions
-        self.electricity_emissions = self.electricity_kwh * factors.get('GRID', 0.82)
+        self.electricity_emissions = self.electricity_kwh * factors['GRID']
         
         # Fuel emissions
         self.fuel_emissions = (
-            self.diesel_liters * factors.get('DIESEL', 2.68) +
-            self.petrol_liters * factors.get('PETROL', 2.31) +
-            self.lpg_kg * factors.get('LPG', 2.98)
+            self.diesel_liters * factors['DIESEL'] +
+            self.petrol_liters * factors['PETROL'] +
+            self.lpg_kg * factors['LPG']
         )
         
         # Water emissions (typically low, but included)
-        self.water_emissions = self.water_kl * factors.get('MUNICIPAL_WATER', 0.344)
+        self.water_emissions = self.water_kl * factors['MUNICIPAL_WATER']
         
         # Waste emissions
-        self.waste_emissions = self.waste_kg * factors.get('GENERAL_WASTE', 0.58)
+        self.waste_emissions = self.waste_kg * factors['GENERAL_WASTE']
         
         # Total
         self.total_emissions = (
@@ -118,9 +244,75 @@ class ConsumptionRecord(models.Model):
         
         return self.total_emissions
     
+    @classmethod
+    def bulk_recalculate(cls, queryset=None):
+        """Recalculate emissions for every record in ``queryset`` with one UPDATE.
+
+        Mirrors ``calculate_emissions`` but evaluates the arithmetic in the
+        database. Returns the number of rows updated.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        factors = {**cls.DEFAULT_FACTORS, **_get_factors()}
+        
+        electricity = F('electricity_kwh') * factors['GRID']
+        fuel = (
+            F('diesel_liters') * factors['DIESEL'] +
+            F('petrol_liters') * factors['PETROL'] +
+            F('lpg_kg') * factors['LPG']
+        )
+        water = F('water_kl') * factors['MUNICIPAL_WATER']
+        waste = F('waste_kg') * factors['GENERAL_WASTE']
+        
+        # update() sends no signals, so invalidate the dashboards it touches;
+        # order_by() keeps Meta.ordering's date out of the DISTINCT
+        institute_ids = list(
+            queryset.order_by().values_list('institute_id', flat=True).distinct()
+        )
+        
+        # UPDATE reads the pre-update column values, so the total is built
+        # from the same expressions rather than the columns being assigned.
+        updated_count = queryset.update(
+            electricity_emissions=electricity,
+            fuel_emissions=fuel,
+            water_emissions=water,
+            waste_emissions=waste,
+            total_emissions=electricity + fuel + water + waste,
+            updated_at=timezone.now(),
+        )
+        for institute_id in institute_ids:
+            bump_dashboard_cache_version(institute_id)
+        return updated_count
+    
     def save(self, *args, **kwargs):
         self.calculate_emissions()
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.institute} - {self.department} - {self.date}"
+
+
+# Cached dashboard stats are keyed on a per-institute version that changes
+# whenever one of the institute's consumption records is written.
+DASHBOARD_CACHE_VERSION_KEY = 'dashstats_ver:{}'
+
+
+def get_dashboard_cache_version(institute_id):
+    """Return the current dashboard cache version for an institute."""
+    key = DASHBOARD_CACHE_VERSION_KEY.format(institute_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_dashboard_cache_version(institute_id):
+    """Invalidate every cached dashboard response for an institute."""
+    cache.set(DASHBOARD_CACHE_VERSION_KEY.format(institute_id), uuid.uuid4().hex, None)
+
+
+@receiver(post_save, sender=ConsumptionRecord)
+@receiver(post_delete, sender=ConsumptionRecord)
+def _invalidate_dashboard_cache(sender, instance, **kwargs):
+    bump_dashboard_cache_version(instance.institute_id)
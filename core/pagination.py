@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ConsumptionRecordCursorPagination(CursorPagination):
+    """Keyset pagination for consumption records, newest first.
+
+    Avoids the COUNT(*) of page-number pagination and seeks through the
+    (institute, -date) index. ``id`` breaks ties between records that share
+    a date so no row is skipped at a page boundary.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-date', '-id')
@@ -4,6 +4,12 @@ from .models import EmissionFactor, ConsumptionRecord
 
 Institute = get_user_model()
 
+# Choice labels, looked up directly rather than via get_FOO_display(),
+# which rebuilds the choices mapping on every call
+CATEGORY_NAMES = dict(EmissionFactor.CATEGORY_CHOICES)
+SUB_CATEGORY_NAMES = dict(EmissionFactor.SUB_CATEGORY_CHOICES)
+DEPARTMENT_NAMES = dict(ConsumptionRecord.DEPARTMENT_CHOICES)
+
 
 class InstituteSerializer(serializers.ModelSerializer):
     """Serializer for Institute registration and profile."""
@@ -40,18 +46,24 @@ class InstituteProfileSerializer(serializers.ModelSerializer):
 
 class EmissionFactorSerializer(serializers.ModelSerializer):
     """Serializer for EmissionFactor."""
-    category_display = serializers.CharField(source='get_category_display', read_only=True)
-    sub_category_display = serializers.CharField(source='get_sub_category_display', read_only=True)
+    category_display = serializers.SerializerMethodField()
+    sub_category_display = serializers.SerializerMethodField()
     
     class Meta:
         model = EmissionFactor
         fields = ['id', 'category', 'category_display', 'sub_category', 'sub_category_display', 
                   'factor', 'unit', 'description', 'source']
+    
+    def get_category_display(self, obj):
+        return CATEGORY_NAMES.get(obj.category, obj.category)
+    
+    def get_sub_category_display(self, obj):
+        return SUB_CATEGORY_NAMES.get(obj.sub_category, obj.sub_category)
 
 
 class ConsumptionRecordSerializer(serializers.ModelSerializer):
     """Serializer for ConsumptionRecord."""
-    department_display = serializers.CharField(source='get_department_display', read_only=True)
+    department_display = serializers.SerializerMethodField()
     
     class Meta:
         model = ConsumptionRecord
@@ -65,6 +77,9 @@ class ConsumptionRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ['electricity_emissions', 'fuel_emissions', 'water_emissions', 
                            'waste_emissions', 'total_emissions', 'created_at', 'updated_at']
     
+    def get_department_display(self, obj):
+        return DEPARTMENT_NAMES.get(obj.department, obj.department)
+    
     def create(self, validated_data):
         validated_data['institute'] = self.context['request'].user
         return super().create(validated_data)
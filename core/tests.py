@@ -1,3 +1,366 @@
-from django.test import TestCase
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .views import DashboardStatsView
+
+from .models import (
+    ConsumptionRecord, EmissionFactor, Institute, FACTOR_CACHE_TTL,
+    FACTOR_VERSION_KEY, cache_is_shared, clear_factor_cache,
+    get_dashboard_cache_version,
+)
+
+# Stands in for a shared Redis/Memcached backend in the cached-path tests
+SHARED_CACHE = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+
+EMISSION_COLUMNS = [
+    'electricity_emissions', 'fuel_emissions', 'water_emissions',
+    'waste_emissions', 'total_emissions',
+]
+
+
+class EmissionFactorCacheTests(TestCase):
+    """The factor mapping is kept in memory and dropped on change."""
+
+    def setUp(self):
+        call_command('seed_emission_factors', stdout=StringIO())
+        self.addCleanup(clear_factor_cache)
+        self.institute = Institute.objects.create_user(
+            username='inst', password='password123', institute_name='Inst'
+        )
+
+    def create_record(self, day):
+        return ConsumptionRecord.objects.create(
+            institute=self.institute, department='LABS',
+            date=date(2025, 1, day), electricity_kwh=100,
+        )
+
+    def test_warm_save_only_inserts(self):
+        self.create_record(1)
+        with self.assertNumQueries(1):
+            self.create_record(2)
+
+    def test_factor_change_is_used_by_next_save(self):
+        self.assertAlmostEqual(self.create_record(1).electricity_emissions, 82.0)
+        grid = EmissionFactor.objects.get(sub_category='GRID')
+        grid.factor = 2.0
+        grid.save()
+        self.assertAlmostEqual(self.create_record(2).electricity_emissions, 200.0)
+
+    def test_reseed_invalidates_cached_factors(self):
+        self.create_record(1)
+        EmissionFactor.objects.filter(sub_category='GRID').update(factor=2.0)
+        call_command('seed_emission_factors', stdout=StringIO())
+        self.assertAlmostEqual(self.create_record(2).electricity_emissions, 82.0)
+
+    def test_cached_factors_expire(self):
+        self.create_record(1)
+        # A write from another worker: no signal reaches this process
+        EmissionFactor.objects.filter(sub_category='GRID').update(factor=2.0)
+        self.assertAlmostEqual(self.create_record(2).electricity_emissions, 82.0)
+
+        later = time.monotonic() + FACTOR_CACHE_TTL
+        with mock.patch('core.models.time.monotonic', return_value=later):
+            self.assertAlmostEqual(self.create_record(3).electricity_emissions, 200.0)
+
+    @SHARED_CACHE
+    @mock.patch('core.models.cache_is_shared', return_value=True)
+    def test_shared_version_stamp_invalidates_at_once(self, _):
+        self.create_record(1)
+        EmissionFactor.objects.filter(sub_category='GRID').update(factor=2.0)
+        # Stands in for another worker clearing its cache after the write
+        cache.set(FACTOR_VERSION_KEY, 'other-worker')
+        self.assertAlmostEqual(self.create_record(2).electricity_emissions, 200.0)
+
+
+class BulkRecalculateTests(TestCase):
+    """bulk_recalculate() must match calculate_emissions() row for row."""
+
+    def setUp(self):
+        call_command('seed_emission_factors', stdout=StringIO())
+        self.addCleanup(clear_factor_cache)
+        self.institute = Institute.objects.create_user(
+            username='inst', password='password123', institute_name='Inst'
+        )
+        for day, department in enumerate(['HOSTEL', 'CANTEEN', 'LABS'], start=1):
+            ConsumptionRecord.objects.create(
+                institute=self.institute, department=department,
+                date=date(2025, 1, day), electricity_kwh=120.5 * day,
+                diesel_liters=3 * day, petrol_liters=2.5, lpg_kg=1.25 * day,
+                water_kl=7, waste_kg=4.5 * day,
+            )
+
+    def test_matches_calculate_emissions_after_factor_change(self):
+        for sub_category, factor in [('GRID', 0.91), ('DIESEL', 2.7), ('GENERAL_WASTE', 0.6)]:
+            factor_obj = EmissionFactor.objects.get(sub_category=sub_category)
+            factor_obj.factor = factor
+            factor_obj.save()
+
+        updated = ConsumptionRecord.bulk_recalculate(
+            ConsumptionRecord.objects.filter(institute=self.institute)
+        )
+
+        self.assertEqual(updated, 3)
+        for record in ConsumptionRecord.objects.all():
+            stored = {column: getattr(record, column) for column in EMISSION_COLUMNS}
+            record.calculate_emissions()
+            for column in EMISSION_COLUMNS:
+                self.assertAlmostEqual(stored[column], getattr(record, column), places=9)
+
+    def test_bumps_dashboard_cache_version(self):
+        version = get_dashboard_cache_version(self.institute.pk)
+        ConsumptionRecord.bulk_recalculate()
+        self.assertNotEqual(get_dashboard_cache_version(self.institute.pk), version)
+
+    def test_bumps_each_institute_once(self):
+        other = Institute.objects.create_user(
+            username='other', password='password123', institute_name='Other'
+        )
+        ConsumptionRecord.objects.create(
+            institute=other, department='LABS', date=date(2025, 1, 1), electricity_kwh=10,
+        )
+        with mock.patch('core.models.bump_dashboard_cache_version') as bump:
+            ConsumptionRecord.bulk_recalculate()
+        self.assertCountEqual(
+            [call.args[0] for call in bump.call_args_list], [self.institute.pk, other.pk]
+        )
+
+    def test_query_count(self):
+        # One SELECT DISTINCT for the institutes and one UPDATE; factors are warm
+        with self.assertNumQueries(2):
+            ConsumptionRecord.bulk_recalculate()
+
+
+class ConsumptionRecordPaginationTests(TestCase):
+    """The list endpoint pages by cursor, newest first, without gaps."""
+
+    def setUp(self):
+        self.institute = Institute.objects.create_user(
+            username='inst', password='password123', institute_name='Inst'
+        )
+        # Several departments share each date to exercise the id tie-breaker
+        for day in range(1, 4):
+            for department in ['HOSTEL', 'CANTEEN', 'LABS']:
+                ConsumptionRecord.objects.create(
+                    institute=self.institute, department=department,
+                    date=date(2025, 1, day), electricity_kwh=10,
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(self.institute)
+
+    def test_pages_cover_all_records_in_order(self):
+        response = self.client.get(reverse('consumption-list-create'), {'page_size': 4})
+
+        self.assertEqual(set(response.data), {'next', 'previous', 'results'})
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(len(response.data['results']), 4)
+
+        seen = []
+        while True:
+            seen += [(item['date'], item['id']) for item in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        expected = list(
+            ConsumptionRecord.objects.order_by('-date', '-id').values_list('date', 'id')
+        )
+        self.assertEqual(seen, [(d.isoformat(), pk) for d, pk in expected])
+
+
+class DashboardCacheTests(TestCase):
+    """Dashboard responses are cached only in a shared in-memory backend."""
+
+    def setUp(self):
+        self.institute = Institute.objects.create_user(
+            username='inst', password='password123', institute_name='Inst'
+        )
+        self.record = ConsumptionRecord.objects.create(
+            institute=self.institute, department='LABS',
+            date=date.today(), electricity_kwh=100,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.institute)
+        self.url = reverse('dashboard-stats')
+
+    def test_uncached_request_is_one_query(self):
+        self.assertFalse(cache_is_shared())
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_database_cache_is_not_shared(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }}):
+            self.assertFalse(cache_is_shared())
+
+    @SHARED_CACHE
+    @mock.patch('core.views.cache_is_shared', return_value=True)
+    def test_cache_hit_makes_no_queries(self, _):
+        with self.assertNumQueries(1):
+            first = self.client.get(self.url).data
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url).data
+        self.assertEqual(first, second)
+
+    @SHARED_CACHE
+    @mock.patch('core.views.cache_is_shared', return_value=True)
+    def test_save_and_delete_invalidate(self, _):
+        self.assertEqual(self.client.get(self.url).data['record_count'], 1)
+
+        ConsumptionRecord.objects.create(
+            institute=self.institute, department='HOSTEL',
+            date=date.today(), electricity_kwh=50,
+        )
+        self.assertEqual(self.client.get(self.url).data['record_count'], 2)
+
+        self.record.delete()
+        self.assertEqual(self.client.get(self.url).data['record_count'], 1)
+
+
+class DashboardStatsTests(TestCase):
+    """compute_stats() must match plain per-section aggregates in one query."""
+
+    def setUp(self):
+        self.institute = Institute.objects.create_user(
+            username='inst', password='password123', institute_name='Inst'
+        )
+        other = Institute.objects.create_user(
+            username='other', password='password123', institute_name='Other'
+        )
+        today = date.today()
+        rows = [
+            (self.institute, 'LABS', today, 100),
+            (self.institute, 'HOSTEL', today, 40),
+            (self.institute, 'CANTEEN', today - timedelta(days=40), 70),
+            (self.institute, 'ADMIN', today - timedelta(days=100), 25),
+            (self.institute, 'TRANSPORT', date(2020, 3, 4), 50),
+            (self.institute, 'ADMIN', date(2020, 12, 4), 30),
+            (other, 'LABS', today, 999),
+        ]
+        for institute, department, day, kwh in rows:
+            ConsumptionRecord.objects.create(
+                institute=institute, department=department, date=day,
+                electricity_kwh=kwh, diesel_liters=kwh / 10, waste_kg=kwh / 5,
+            )
+
+    def expected_stats(self, **period):
+        """The dashboard payload computed the straightforward way."""
+        records = ConsumptionRecord.objects.filter(institute=self.institute, **period)
+        totals = records.aggregate(
+            **{field: Sum(field) for field in EMISSION_COLUMNS}, record_count=Count('id')
+        )
+        departments = records.values('department').annotate(
+            total=Sum('total_emissions')
+        ).order_by('department')
+        monthly = (
+            ConsumptionRecord.objects
+            .filter(institute=self.institute, date__gte=date.today() - timedelta(days=365))
+            .annotate(month=TruncMonth('date'))
+            .values('month')
+            .annotate(**{field: Sum(field) for field in EMISSION_COLUMNS})
+            .order_by('month')
+        )
+        return {
+            **{field: round(totals[field] or 0, 2) for field in EMISSION_COLUMNS},
+            'department_breakdown': {
+                item['department']: round(item['total'], 2) for item in departments
+            },
+            'monthly_trend': [
+                {
+                    'month': item['month'].strftime('%Y-%m'),
+                    **{field: round(item[field], 2) for field in EMISSION_COLUMNS},
+                }
+                for item in monthly
+            ],
+            'record_count': totals['record_count'],
+        }
+
+    def assert_stats(self, expected, year=None, month=None):
+        with self.assertNumQueries(1):
+            stats = DashboardStatsView().compute_stats(self.institute.pk, year, month)
+        self.assertEqual(stats, expected)
+        self.assertEqual(
+            list(stats['department_breakdown']),
+            list(expected['department_breakdown']),
+        )
+
+    def test_no_filter(self):
+        self.assert_stats(self.expected_stats())
+
+    def test_year(self):
+        year = date.today().year
+        self.assert_stats(self.expected_stats(date__year=year), year=year)
+
+    def test_year_and_month(self):
+        today = date.today()
+        self.assert_stats(
+            self.expected_stats(date__year=today.year, date__month=today.month),
+            year=today.year, month=today.month,
+        )
+
+    def test_month_only(self):
+        self.assert_stats(self.expected_stats(date__month=12), month=12)
+
+    def test_period_outside_trend_window(self):
+        expected = self.expected_stats(date__year=2020)
+        self.assertEqual(expected['record_count'], 2)
+        self.assert_stats(expected, year=2020)
+
+    def test_empty_period(self):
+        expected = self.expected_stats(date__year=1999)
+        self.assertEqual(expected['department_breakdown'], {})
+        self.assert_stats(expected, year=1999)
+
+
+class BulkRegisterTests(TestCase):
+    """Institute.objects.bulk_register() validates every row before inserting."""
+
+    def valid_row(self, username='college'):
+        return {
+            'username': username, 'email': f'{username}@EXAMPLE.COM',
+            'password': 'secret-pass-1', 'institute_name': 'College', 'city': 'Pune',
+        }
+
+    def test_creates_institutes_with_hashed_passwords(self):
+        Institute.objects.bulk_register([self.valid_row('one'), self.valid_row('two')])
+
+        institute = Institute.objects.get(username='one')
+        self.assertEqual(institute.email, 'one@example.com')
+        self.assertEqual(institute.city, 'Pune')
+        self.assertTrue(institute.check_password('secret-pass-1'))
+        self.assertEqual(Institute.objects.count(), 2)
+
+    def test_invalid_row_rejects_whole_batch(self):
+        bad_row = {
+            'username': 'bad user!', 'email': 'not-an-email',
+            'password': '', 'institute_name': '',
+        }
+        with self.assertRaises(ValidationError) as ctx:
+            Institute.objects.bulk_register([self.valid_row(), bad_row])
+
+        fields = {message.split(': ')[1] for message in ctx.exception.messages}
+        self.assertEqual(fields, {'username', 'email', 'password', 'institute_name'})
+        self.assertTrue(all(message.startswith('Row 2:') for message in ctx.exception.messages))
+        self.assertFalse(Institute.objects.exists())
+
+    def test_blank_email_is_rejected(self):
+        row = self.valid_row()
+        row['email'] = ''
+        with self.assertRaises(ValidationError):
+            Institute.objects.bulk_register([row])
@@ -2,31 +2,138 @@ from rest_framework import generics, status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.db.models import Sum
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import FileResponse
 from django.contrib.auth import get_user_model
-from datetime import datetime, timedelta
-from io import BytesIO
+from datetime import date, datetime, timedelta
+import tempfile
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
+from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
-from .models import EmissionFactor, ConsumptionRecord
+from .models import EmissionFactor, ConsumptionRecord, cache_is_shared, get_dashboard_cache_version
+from .pagination import ConsumptionRecordCursorPagination
 from .serializers import (
     InstituteSerializer, InstituteProfileSerializer,
-    EmissionFactorSerializer, ConsumptionRecordSerializer
+    EmissionFactorSerializer, ConsumptionRecordSerializer,
+    DEPARTMENT_NAMES,
 )
 
 Institute = get_user_model()
 
+# Report styles and layout are static, so they are built once per process.
+# Flowables (Paragraph, Table) keep layout state and are still built per request.
+REPORT_STYLES = getSampleStyleSheet()
+REPORT_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=REPORT_STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    textColor=colors.HexColor('#1a365d'),
+    alignment=1,
+)
+REPORT_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=REPORT_STYLES['Heading2'],
+    fontSize=16,
+    spaceBefore=20,
+    spaceAfter=10,
+    textColor=colors.HexColor('#2b6cb0'),
+)
+REPORT_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2b6cb0')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ebf8ff')),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bee3f8')),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+])
+REPORT_DEPARTMENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#38a169')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0fff4')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#9ae6b4')),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+])
+REPORT_TABLE_COL_WIDTHS = (3*inch, 2*inch)
+REPORT_RECOMMENDATIONS = (
+    "• Switch to LED lighting in high-consumption areas to reduce electricity usage.",
+    "• Implement rainwater harvesting to reduce municipal water dependency.",
+    "• Set up composting facilities for organic waste management.",
+    "• Consider solar panels for renewable energy generation.",
+    "• Promote public transport and carpooling among staff and students.",
+)
+
+# Seconds a computed dashboard response is served from cache
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# PDFs larger than this are spooled to a temporary file instead of memory
+REPORT_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+# Concrete ConsumptionRecord columns, loaded when records are serialized
+RECORD_FIELDS = tuple(field.name for field in ConsumptionRecord._meta.concrete_fields)
+
+# Summed columns returned by the analytics endpoints
+EMISSION_FIELDS = (
+    'total_emissions', 'electricity_emissions', 'fuel_emissions',
+    'water_emissions', 'waste_emissions',
+)
+CONSUMPTION_FIELDS = (
+    'electricity_kwh', 'diesel_liters', 'petrol_liters', 'lpg_kg',
+    'water_kl', 'waste_kg',
+)
+
+
+def _rounded(values, fields, prefix=''):
+    """Return ``fields`` from ``values`` rounded to 2 places, with NULL sums as 0.
+
+    ``prefix`` selects aliased keys, e.g. ``trend_total_emissions``.
+    """
+    return {field: round(values[prefix + field] or 0, 2) for field in fields}
+
+
+def _institute_records(institute):
+    """Return an institute's records for serialization.
+
+    The joined institute row is narrowed to the columns ``__str__`` reads,
+    so the list and detail endpoints never fetch password hashes and other
+    profile data. The analytics views aggregate through ``values()`` and
+    never load model instances at all.
+    """
+    return (
+        ConsumptionRecord.objects
+        .filter(institute=institute)
+        .select_related('institute')
+        .only(*RECORD_FIELDS, 'institute__username', 'institute__institute_name')
+    )
+
+
+def _month_bounds(year, month):
+    """Return the [start, end) dates covering the given month."""
+    start = date(year, month, 1)
+    if month == 12:
+        return start, date(year + 1, 1, 1)
+    return start, date(year, month + 1, 1)
+
 
 class RegisterView(generics.CreateAPIView):
     """API endpoint for institute registration."""
@@ -55,9 +162,10 @@ class ConsumptionRecordListCreateView(generics.ListCreateAPIView):
     """API endpoint to list and create consumption records."""
     serializer_class = ConsumptionRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ConsumptionRecordCursorPagination
     
     def get_queryset(self):
-        return ConsumptionRecord.objects.filter(institute=self.request.user)
+        return _institute_records(self.request.user)
 
 
 class ConsumptionRecordDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -66,7 +174,7 @@ class ConsumptionRecordDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return ConsumptionRecord.objects.filter(institute=self.request.user)
+        return _institute_records(self.request.user)
 
 
 class DashboardStatsView(APIView):
@@ -74,75 +182,109 @@ class DashboardStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        records = ConsumptionRecord.objects.filter(institute=request.user)
-        
         # Get date filter from query params
         year = request.query_params.get('year')
         month = request.query_params.get('month')
-        
-        if year:
-            records = records.filter(date__year=int(year))
-        if month:
-            records = records.filter(date__month=int(month))
-        
-        # Aggregate totals
-        totals = records.aggregate(
-            total_emissions=Sum('total_emissions'),
-            electricity_emissions=Sum('electricity_emissions'),
-            fuel_emissions=Sum('fuel_emissions'),
-            water_emissions=Sum('water_emissions'),
-            waste_emissions=Sum('waste_emissions'),
+        year = int(year) if year else None
+        month = int(month) if month else None
+        
+        # Cached per institute; the version changes whenever one of its
+        # consumption records is saved or deleted. A process-local cache
+        # would miss other workers' invalidations, so skip caching there.
+        institute_id = request.user.pk
+        if not cache_is_shared():
+            return Response(self.compute_stats(institute_id, year, month))
+        version = get_dashboard_cache_version(institute_id)
+        key = f'dashstats:{institute_id}:{year}:{month}:{version}'
+        stats = cache.get_or_set(
+            key,
+            lambda: self.compute_stats(institute_id, year, month),
+            DASHBOARD_CACHE_TIMEOUT,
         )
+        return Response(stats)
+    
+    def compute_stats(self, institute_id, year=None, month=None):
+        """Build the dashboard payload for one institute.
+
+        ``year``/``month`` narrow the totals, department breakdown and record
+        count. The monthly trend deliberately ignores them and always covers
+        the last 12 months, so the chart keeps its context when a single
+        month or year is selected.
+        """
+        # Records counted in the totals: the requested year/month, if any
+        if year is not None and month is not None and 1 <= month <= 12:
+            # Filter a single month as a date range so the (institute, date)
+            # index is usable; ``date__month`` compiles to EXTRACT(month).
+            start, end = _month_bounds(year, month)
+            period = Q(date__gte=start, date__lt=end)
+        else:
+            period = Q()
+            if year is not None:
+                period &= Q(date__year=year)
+            if month is not None:
+                period &= Q(date__month=month)
         
-        # Department breakdown
-        department_data = records.values('department').annotate(
-            total=Sum('total_emissions')
-        ).order_by('department')
+        # Records in the monthly trend: always the last 12 months
+        twelve_months_ago = timezone.now().date() - timedelta(days=365)
+        trend = Q(date__gte=twelve_months_ago)
         
-        department_breakdown = {
-            item['department']: round(item['total'] or 0, 2) 
-            for item in department_data
-        }
+        records = ConsumptionRecord.objects.filter(institute_id=institute_id)
+        if period:
+            records = records.filter(period | trend)
         
-        # Monthly trend (last 12 months)
-        twelve_months_ago = timezone.now().date() - timedelta(days=365)
+        # One query grouped by month serves both row sets: filtered sums give
+        # the trend columns and the per-month share of the totals, which are
+        # then added up in Python (one row per month, so only a few rows).
+        in_period = period or None
         monthly_data = (
-            ConsumptionRecord.objects
-            .filter(institute=request.user, date__gte=twelve_months_ago)
+            records
             .annotate(month=TruncMonth('date'))
             .values('month')
             .annotate(
-                total_emissions=Sum('total_emissions'),
-                electricity_emissions=Sum('electricity_emissions'),
-                fuel_emissions=Sum('fuel_emissions'),
-                water_emissions=Sum('water_emissions'),
-                waste_emissions=Sum('waste_emissions'),
+                **{f'trend_{field}': Sum(field, filter=trend) for field in EMISSION_FIELDS},
+                **{f'period_{field}': Sum(field, filter=in_period) for field in EMISSION_FIELDS},
+                **{
+                    f'dept_{code}': Sum('total_emissions', filter=Q(department=code) & period)
+                    for code, _ in ConsumptionRecord.DEPARTMENT_CHOICES
+                },
+                period_count=Count('id', filter=in_period),
             )
             .order_by('month')
         )
         
-        monthly_trend = [
-            {
+        totals = dict.fromkeys(EMISSION_FIELDS, 0)
+        department_totals = {}
+        record_count = 0
+        monthly_trend = []
+        for item in monthly_data:
+            record_count += item['period_count']
+            for field in EMISSION_FIELDS:
+                totals[field] += item[f'period_{field}'] or 0
+            for code, _ in ConsumptionRecord.DEPARTMENT_CHOICES:
+                if item[f'dept_{code}'] is not None:
+                    department_totals[code] = department_totals.get(code, 0) + item[f'dept_{code}']
+            
+            # Months that only hold records outside the trend window
+            if item['trend_total_emissions'] is None:
+                continue
+            monthly_trend.append({
                 'month': item['month'].strftime('%Y-%m') if item['month'] else '',
-                'total_emissions': round(item['total_emissions'] or 0, 2),
-                'electricity_emissions': round(item['electricity_emissions'] or 0, 2),
-                'fuel_emissions': round(item['fuel_emissions'] or 0, 2),
-                'water_emissions': round(item['water_emissions'] or 0, 2),
-                'waste_emissions': round(item['waste_emissions'] or 0, 2),
-            }
-            for item in monthly_data
-        ]
+                **_rounded(item, EMISSION_FIELDS, prefix='trend_'),
+            })
+        
+        # Department breakdown (only departments that have records)
+        # (keyed alphabetically, as the former order_by('department') was)
+        department_breakdown = {
+            code: round(department_totals[code], 2)
+            for code in sorted(department_totals)
+        }
         
-        return Response({
-            'total_emissions': round(totals['total_emissions'] or 0, 2),
-            'electricity_emissions': round(totals['electricity_emissions'] or 0, 2),
-            'fuel_emissions': round(totals['fuel_emissions'] or 0, 2),
-            'water_emissions': round(totals['water_emissions'] or 0, 2),
-            'waste_emissions': round(totals['waste_emissions'] or 0, 2),
+        return {
+            **_rounded(totals, EMISSION_FIELDS),
             'department_breakdown': department_breakdown,
             'monthly_trend': monthly_trend,
-            'record_count': records.count(),
-        })
+            'record_count': record_count,
+        }
 
 
 class ComparisonView(APIView):
@@ -154,39 +296,16 @@ class ComparisonView(APIView):
         
         # Get comparison data by department
         comparison = records.values('department').annotate(
-            total_emissions=Sum('total_emissions'),
-            electricity_emissions=Sum('electricity_emissions'),
-            fuel_emissions=Sum('fuel_emissions'),
-            water_emissions=Sum('water_emissions'),
-            waste_emissions=Sum('waste_emissions'),
-            electricity_kwh=Sum('electricity_kwh'),
-            diesel_liters=Sum('diesel_liters'),
-            petrol_liters=Sum('petrol_liters'),
-            lpg_kg=Sum('lpg_kg'),
-            water_kl=Sum('water_kl'),
-            waste_kg=Sum('waste_kg'),
+            **{field: Sum(field) for field in EMISSION_FIELDS + CONSUMPTION_FIELDS}
         ).order_by('department')
         
         result = []
-        dept_names = dict(ConsumptionRecord.DEPARTMENT_CHOICES)
-        
         for item in comparison:
             result.append({
                 'department': item['department'],
-                'department_name': dept_names.get(item['department'], item['department']),
-                'total_emissions': round(item['total_emissions'] or 0, 2),
-                'electricity_emissions': round(item['electricity_emissions'] or 0, 2),
-                'fuel_emissions': round(item['fuel_emissions'] or 0, 2),
-                'water_emissions': round(item['water_emissions'] or 0, 2),
-                'waste_emissions': round(item['waste_emissions'] or 0, 2),
-                'consumption': {
-                    'electricity_kwh': round(item['electricity_kwh'] or 0, 2),
-                    'diesel_liters': round(item['diesel_liters'] or 0, 2),
-                    'petrol_liters': round(item['petrol_liters'] or 0, 2),
-                    'lpg_kg': round(item['lpg_kg'] or 0, 2),
-                    'water_kl': round(item['water_kl'] or 0, 2),
-                    'waste_kg': round(item['waste_kg'] or 0, 2),
-                }
+                'department_name': DEPARTMENT_NAMES.get(item['department'], item['department']),
+                **_rounded(item, EMISSION_FIELDS),
+                'consumption': _rounded(item, CONSUMPTION_FIELDS),
             })
         
         return Response(result)
@@ -205,53 +324,35 @@ class GenerateReportView(APIView):
         if year:
             records = records.filter(date__year=int(year))
         
-        # Aggregate data
-        totals = records.aggregate(
-            total_emissions=Sum('total_emissions'),
-            electricity_emissions=Sum('electricity_emissions'),
-            fuel_emissions=Sum('fuel_emissions'),
-            water_emissions=Sum('water_emissions'),
-            waste_emissions=Sum('waste_emissions'),
+        # Per-department sums in one query; the grand totals are summed from
+        # these few rows rather than fetched with a second aggregate.
+        department_data = list(
+            records.values('department').annotate(
+                **{field: Sum(field) for field in EMISSION_FIELDS}
+            ).order_by('department')
         )
         
-        department_data = records.values('department').annotate(
-            total=Sum('total_emissions')
-        ).order_by('department')
+        totals = {
+            field: sum(item[field] or 0 for item in department_data)
+            for field in EMISSION_FIELDS
+        }
         
-        # Create PDF
-        buffer = BytesIO()
+        # Create PDF; spooled to disk if it grows large, then streamed out
+        buffer = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
         
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor('#1a365d'),
-            alignment=1,
-        )
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceBefore=20,
-            spaceAfter=10,
-            textColor=colors.HexColor('#2b6cb0'),
-        )
-        
         story = []
         
         # Title
-        story.append(Paragraph("Carbon Emissions Report", title_style))
-        story.append(Paragraph(f"<b>Institute:</b> {institute.institute_name or institute.username}", styles['Normal']))
-        story.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
+        story.append(Paragraph("Carbon Emissions Report", REPORT_TITLE_STYLE))
+        story.append(Paragraph(f"<b>Institute:</b> {institute.institute_name or institute.username}", REPORT_STYLES['Normal']))
+        story.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y')}", REPORT_STYLES['Normal']))
         if year:
-            story.append(Paragraph(f"<b>Period:</b> Year {year}", styles['Normal']))
+            story.append(Paragraph(f"<b>Period:</b> Year {year}", REPORT_STYLES['Normal']))
         story.append(Spacer(1, 20))
         
         # Summary Section
-        story.append(Paragraph("Executive Summary", heading_style))
+        story.append(Paragraph("Executive Summary", REPORT_HEADING_STYLE))
         
         summary_data = [
             ['Emission Category', 'Value (kg CO2e)'],
@@ -262,78 +363,41 @@ class GenerateReportView(APIView):
             ['Waste', f"{totals['waste_emissions'] or 0:,.2f}"],
         ]
         
-        summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2b6cb0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ebf8ff')),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bee3f8')),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ]))
+        summary_table = Table(summary_data, colWidths=REPORT_TABLE_COL_WIDTHS)
+        summary_table.setStyle(REPORT_SUMMARY_TABLE_STYLE)
         story.append(summary_table)
         story.append(Spacer(1, 20))
         
         # Department Breakdown
-        story.append(Paragraph("Department-wise Breakdown", heading_style))
+        story.append(Paragraph("Department-wise Breakdown", REPORT_HEADING_STYLE))
         
-        dept_names = dict(ConsumptionRecord.DEPARTMENT_CHOICES)
         dept_data = [['Department', 'Emissions (kg CO2e)']]
         for item in department_data:
             dept_data.append([
-                dept_names.get(item['department'], item['department']),
-                f"{item['total'] or 0:,.2f}"
+                DEPARTMENT_NAMES.get(item['department'], item['department']),
+                f"{item['total_emissions'] or 0:,.2f}"
             ])
         
         if len(dept_data) > 1:
-            dept_table = Table(dept_data, colWidths=[3*inch, 2*inch])
-            dept_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#38a169')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0fff4')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#9ae6b4')),
-                ('TOPPADDING', (0, 1), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-            ]))
+            dept_table = Table(dept_data, colWidths=REPORT_TABLE_COL_WIDTHS)
+            dept_table.setStyle(REPORT_DEPARTMENT_TABLE_STYLE)
             story.append(dept_table)
         else:
-            story.append(Paragraph("No department data available.", styles['Normal']))
+            story.append(Paragraph("No department data available.", REPORT_STYLES['Normal']))
         
         story.append(Spacer(1, 30))
         
         # Recommendations
-        story.append(Paragraph("Recommendations", heading_style))
+        story.append(Paragraph("Recommendations", REPORT_HEADING_STYLE))
         
-        recommendations = [
-            "• Switch to LED lighting in high-consumption areas to reduce electricity usage.",
-            "• Implement rainwater harvesting to reduce municipal water dependency.",
-            "• Set up composting facilities for organic waste management.",
-            "• Consider solar panels for renewable energy generation.",
-            "• Promote public transport and carpooling among staff and students.",
-        ]
-        
-        for rec in recommendations:
-            story.append(Paragraph(rec, styles['Normal']))
+        for rec in REPORT_RECOMMENDATIONS:
+            story.append(Paragraph(rec, REPORT_STYLES['Normal']))
             story.append(Spacer(1, 5))
         
         # Build PDF
         doc.build(story)
         buffer.seek(0)
         
-        # Create response
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+        # Stream the response; FileResponse closes the buffer when done
         filename = f"carbon_report_{institute.username}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return FileResponse(buffer, as_attachment=True, filename=filename, content_type='application/pdf')